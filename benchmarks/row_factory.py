@@ -0,0 +1,126 @@
+import argparse
+import json
+import sqlite3
+import time
+from dataclasses import field, make_dataclass
+from pathlib import Path
+
+
+EXAMPLE_CONFIG = Path(__file__).resolve().parent.parent / 'example_db.json'
+
+
+def load_table(config_path, table_name):
+    with open(config_path, 'r') as f:
+        config = json.load(f)
+
+    for tables in config.values():
+        if isinstance(tables, dict):
+            tables = tables['tables']
+        for table in tables:
+            if table['table_name'] == table_name:
+                return table
+
+    msg = f'TABLE {table_name} NOT FOUND IN {config_path}'
+    raise ValueError(msg)
+
+
+def build_dataclass(table):
+    fields = [
+        (
+            column['name'],
+            int if column['data_type'] == 'INTEGER' else str
+        )
+        for column in table['columns']
+    ]
+    fields.append(('rowid', int | None, field(default=None)))
+    return make_dataclass(table['dataclass_name'], fields, slots=True)
+
+
+def fill(con, table, rows):
+    columns = [column['name'] for column in table['columns']]
+    con.execute(
+        f'''
+            CREATE TABLE {table['table_name']}(
+                {', '.join(f"{column['name']} {column['data_type']}" for column in table['columns'])},
+                rowid INTEGER PRIMARY KEY AUTOINCREMENT
+            )
+        '''
+    )
+    values = [
+        tuple(
+            i if column['data_type'] == 'INTEGER' else f'{column["name"]}_{i}'
+            for column in table['columns']
+        )
+        for i in range(rows)
+    ]
+    con.executemany(
+        f'''
+            INSERT INTO {table['table_name']}({', '.join(columns)})
+            VALUES ({', '.join('?' for _ in columns)})
+        ''',
+        values
+    )
+    con.commit()
+
+
+def time_read(con, sql, row_factory, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        cur = con.cursor()
+        cur.row_factory = row_factory
+        start = time.perf_counter()
+        cur.execute(sql)
+        rows = cur.fetchall()
+        best = min(best, time.perf_counter() - start)
+    return len(rows), best
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='read_all() rows/sec with the generic vs compiled row factory'
+    )
+    parser.add_argument('--config', default=str(EXAMPLE_CONFIG))
+    parser.add_argument('--table', default='player_stats')
+    parser.add_argument('--rows', type=int, default=200_000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    table = load_table(args.config, args.table)
+    cls = build_dataclass(table)
+    select = ', '.join(
+        [column['name'] for column in table['columns']] + ['rowid']
+    )
+
+    def generic_row_factory(cur, row):
+        fields = [column[0] for column in cur.description]
+        as_dict = {key: value for key, value in zip(fields, row)}
+        return cls(**as_dict)
+
+    def compiled_row_factory(cur, row):
+        return cls(*row)
+
+    con = sqlite3.connect(':memory:')
+    fill(con, table, args.rows)
+
+    results = {
+        'before (SELECT *, generic factory)': time_read(
+            con,
+            f'SELECT * FROM {args.table}',
+            generic_row_factory,
+            args.repeat
+        ),
+        'after (explicit columns, compiled factory)': time_read(
+            con,
+            f'SELECT {select} FROM {args.table}',
+            compiled_row_factory,
+            args.repeat
+        ),
+    }
+
+    print(f'{args.table}: {args.rows} rows, best of {args.repeat}')
+    for name, (count, seconds) in results.items():
+        print(f'\t{name}: {count / seconds:,.0f} rows/sec')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,337 @@
+import argparse
+import importlib
+import json
+import platform
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from math import isqrt
+from pathlib import Path
+from statistics import median, quantiles
+
+
+ROOT = Path(__file__).resolve().parent.parent
+EXAMPLE_CONFIG = ROOT / 'example_db.json'
+
+sys.path.insert(0, str(ROOT))
+
+from sql.classes.classes import Database
+from sql.templating import generate_filesystem, generate_module
+
+
+def load_schema(config_path, db_name=None):
+    with open(config_path, 'r') as f:
+        config = json.load(f)
+
+    if db_name is None:
+        if len(config) != 1:
+            msg = f'{config_path} DEFINES {len(config)} DATABASES, PICK ONE WITH --db'
+            raise ValueError(msg)
+        db_name = next(iter(config))
+    if db_name not in config:
+        msg = f'DATABASE {db_name} NOT FOUND IN {config_path}'
+        raise ValueError(msg)
+
+    return Database.from_config(db_name, config[db_name])
+
+
+class Synthesizer:
+    def __init__(self, db, schema, rows, seed):
+        self.db = db
+        self.rows = rows
+        self.random = random.Random(seed)
+        self.keys = {}
+        self.domains = {}
+
+        for table in schema.tables:
+            for group in table.groups:
+                for column in group.columns:
+                    self.domains.setdefault((table.name, column.name), group.name)
+
+
+    def parent_keys(self, table_name, column_name):
+        key = (table_name, column_name)
+        if key not in self.keys:
+            if column_name == 'rowid':
+                self.keys[key] = range(1, self.rows[table_name] + 1)
+            else:
+                with self.db.pool.connection() as con:
+                    cur = con.cursor()
+                    cur.execute(
+                        f'SELECT DISTINCT {column_name} FROM {table_name} ORDER BY {column_name}'
+                    )
+                    self.keys[key] = [row[0] for row in cur.fetchall()]
+            if not self.keys[key]:
+                msg = f'CANNOT REFERENCE {table_name}({column_name}), IT HAS NO ROWS'
+                raise ValueError(msg)
+        return self.keys[key]
+
+
+    def value(self, table, column, i):
+        classes = column.classes
+        cardinality = max(1, isqrt(self.rows[table.name]))
+
+        if 'references' in classes.check:
+            keys = self.parent_keys(
+                classes.reference_table,
+                classes.reference_column
+            )
+            if classes.returns == 'single':
+                return keys[i % len(keys)]
+            return self.random.choice(keys)
+
+        if classes.returns == 'single':
+            if column.data_type == 'INTEGER':
+                return i + 1
+            return f'{column.name}_{i}'
+
+        domain = self.domains.get((table.name, column.name))
+        if domain or classes.returns == 'group':
+            k = self.random.randrange(cardinality)
+            if column.data_type == 'INTEGER':
+                return k
+            return f'{domain or column.name}_{k}'
+
+        if column.data_type == 'INTEGER':
+            return self.random.randrange(1_000_000)
+        return f'{column.name}_{self.random.getrandbits(32):08x}'
+
+
+    def generate(self, table, start, count):
+        for i in range(start, start + count):
+            yield {
+                column.name: self.value(table, column, i)
+                for column in table.columns
+            }
+
+
+def summarize(timings, rows):
+    total = sum(timings)
+    summary = {
+        'calls': len(timings),
+        'rows': rows,
+        'seconds': total,
+        'ops_per_sec': len(timings) / total if total else None,
+        'mean_ms': total / len(timings) * 1000,
+        'p50_ms': median(timings) * 1000,
+    }
+    summary['p95_ms'] = (
+        quantiles(timings, n=20)[-1] * 1000
+        if len(timings) > 1 else summary['p50_ms']
+    )
+    return summary
+
+
+def count_rows(result):
+    if result is None:
+        return 0
+    if isinstance(result, list):
+        return len(result)
+    return 1
+
+
+def time_calls(method, calls):
+    timings = []
+    rows = 0
+    for args in calls:
+        start = time.perf_counter()
+        result = method(*args)
+        timings.append(time.perf_counter() - start)
+        rows += count_rows(result)
+    return summarize(timings, rows)
+
+
+def table_operations(table, schema_table, samples):
+    yield 'read_by_rowid', table.read_by_rowid, [(obj.rowid,) for obj in samples]
+
+    for column in schema_table.single_columns + schema_table.list_columns:
+        yield (
+            f'read_by_{column.name}',
+            getattr(table, f'read_by_{column.name}'),
+            [(getattr(obj, column.name),) for obj in samples]
+        )
+
+    for group in schema_table.groups:
+        yield (
+            f'read_by_{group.name}',
+            getattr(table, f'read_by_{group.name}'),
+            [(getattr(obj, group.columns[0].name),) for obj in samples]
+        )
+
+    for filter in schema_table.filters:
+        yield (
+            f'read_by_{filter.name}',
+            getattr(table, f'read_by_{filter.name}'),
+            [
+                tuple(
+                    [getattr(obj, column.name) for column in filter.columns]
+                    + [getattr(obj, group.columns[0].name) for group in filter.groups]
+                )
+                for obj in samples
+            ]
+        )
+
+
+def run_scale(schema, scale, args, workdir):
+    rows = {table.name: scale for table in schema.tables}
+    rows.update(args.rows)
+
+    fs = generate_filesystem(workdir, schema)
+    generate_module(schema, fs)
+    sys.path.insert(0, str(workdir))
+
+    results = []
+
+    def record(table_name, operation, summary):
+        results.append({
+            'scale': scale,
+            'table': table_name,
+            'operation': operation,
+            **summary
+        })
+        print(
+            f'\t{table_name}.{operation}: '
+            f'{summary["ops_per_sec"] or 0:,.0f} ops/sec, '
+            f'p95 {summary["p95_ms"]:.3f} ms, {summary["rows"]:,} rows'
+        )
+
+    try:
+        module = importlib.import_module(schema.name)
+        db = module.Database(db_dir=str(fs['data']['db']))
+        synthesizer = Synthesizer(db, schema, rows, args.seed)
+
+        if not args.cache:
+            for table in db.tables:
+                table.set_cache_size(0)
+                table.set_query_cache(size=0)
+
+        for schema_table in schema.creation_order:
+            table = getattr(db, schema_table.name)
+            count = rows[schema_table.name]
+
+            start = time.perf_counter()
+            table.add_many(
+                synthesizer.generate(schema_table, 0, count),
+                chunk_size=args.chunk_size,
+                return_rowids=False
+            )
+            elapsed = time.perf_counter() - start
+            record(schema_table.name, 'add_many', {
+                'calls': 1,
+                'rows': count,
+                'seconds': elapsed,
+                'ops_per_sec': count / elapsed if elapsed else None,
+                'mean_ms': elapsed * 1000,
+                'p50_ms': elapsed * 1000,
+                'p95_ms': elapsed * 1000,
+            })
+
+        rng = random.Random(args.seed)
+        for schema_table in schema.tables:
+            table = getattr(db, schema_table.name)
+            count = rows[schema_table.name]
+            samples = [
+                table.read_by_rowid(rng.randint(1, count))
+                for _ in range(args.samples)
+            ]
+
+            record(
+                schema_table.name,
+                'read_all',
+                time_calls(table.read_all, [()] * args.repeat)
+            )
+            for operation, method, calls in table_operations(
+                table,
+                schema_table,
+                samples
+            ):
+                record(schema_table.name, operation, time_calls(method, calls))
+
+            new_rows = list(synthesizer.generate(schema_table, count, args.samples))
+            record(
+                schema_table.name,
+                'add',
+                time_calls(table.add, [(row,) for row in new_rows])
+            )
+
+        db.close()
+    finally:
+        sys.path.remove(str(workdir))
+        for name in list(sys.modules):
+            if name == schema.name or name.startswith(f'{schema.name}.'):
+                del sys.modules[name]
+
+    return results
+
+
+def parse_rows(value):
+    table_name, _, count = value.partition('=')
+    if not count.isdigit():
+        msg = f'EXPECTED TABLE=ROWS, GOT {value}'
+        raise argparse.ArgumentTypeError(msg)
+    return table_name, int(count)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='time the generated module against synthetic data'
+    )
+    parser.add_argument('config', nargs='?', default=str(EXAMPLE_CONFIG))
+    parser.add_argument('--db', default=None)
+    parser.add_argument('--scales', type=int, nargs='+', default=[10_000])
+    parser.add_argument('--rows', type=parse_rows, action='append', default=[])
+    parser.add_argument('--samples', type=int, default=200)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--chunk-size', type=int, default=10_000)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--cache', action='store_true')
+    parser.add_argument('--workdir', default=None)
+    parser.add_argument('-o', '--output', default='benchmark_results.json')
+    args = parser.parse_args()
+    args.rows = dict(args.rows)
+
+    schema = load_schema(args.config, args.db)
+    for table_name in args.rows:
+        if table_name not in [table.name for table in schema.tables]:
+            msg = f'TABLE {table_name} NOT FOUND IN {args.config}'
+            raise ValueError(msg)
+
+    results = []
+    for scale in args.scales:
+        print(f'{schema.name}: {scale:,} rows per table')
+        if args.workdir:
+            workdir = Path(args.workdir, str(scale)).resolve()
+            workdir.mkdir(parents=True)
+            results.extend(run_scale(schema, scale, args, workdir))
+        else:
+            with tempfile.TemporaryDirectory() as tmp:
+                results.extend(run_scale(schema, scale, args, Path(tmp)))
+
+    report = {
+        'database': schema.name,
+        'config': str(Path(args.config).resolve()),
+        'created': datetime.now(timezone.utc).isoformat(),
+        'python': platform.python_version(),
+        'sqlite': sqlite3.sqlite_version,
+        'platform': platform.platform(),
+        'parameters': {
+            'scales': args.scales,
+            'rows': args.rows,
+            'samples': args.samples,
+            'repeat': args.repeat,
+            'chunk_size': args.chunk_size,
+            'seed': args.seed,
+            'cache': args.cache,
+        },
+        'results': results,
+    }
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=4)
+    print(f'results written to {args.output}')
+
+
+if __name__ == '__main__':
+    main()
@@ -1,3 +1,6 @@
-from classes import TK
+import sys
 
-TK.mainloop()
+from .cli import main
+
+
+sys.exit(main())
@@ -1,117 +1,279 @@
+import hashlib
+import heapq
+
+
+PRAGMA_PROFILES = {
+    'default': {},
+    'read-heavy': {
+        'journal_mode': 'WAL',
+        'synchronous': 'NORMAL',
+        'mmap_size': 268435456,
+        'cache_size': -65536,
+        'temp_store': 'MEMORY'
+    },
+    'bulk-load': {
+        'journal_mode': 'WAL',
+        'synchronous': 'OFF',
+        'cache_size': -262144,
+        'temp_store': 'MEMORY'
+    }
+}
+
+
+class SchemaError(ValueError):
+    def __init__(self, errors):
+        self.errors = errors
+        super().__init__('\n'.join(errors))
+
+
 class Database:
     def __init__(
         self,
         db_name,
-        tables
+        tables,
+        generate_async=False,
+        joins=(),
+        profile='default',
+        pragmas=None
     ):
         self.name = db_name
+        self.generate_async = generate_async
+        self.pragmas = self.resolve_pragmas(profile, pragmas or {})
         self.tables = [Table(**table) for table in tables]
+        self.joins = []
+
+        errors = self.compile()
+        if not errors:
+            self.link_references()
+            for join in joins:
+                try:
+                    self.joins.append(JoinTable(self.tables, **join))
+                except ValueError as e:
+                    errors.append(str(e))
+
+            names = set(self.table_index)
+            for join in self.joins:
+                if join.name in names:
+                    errors.append(f'JOIN TABLE {join.name} HAS THE SAME NAME AS ANOTHER TABLE')
+                names.add(join.name)
+
+        if errors:
+            raise SchemaError(errors)
+
+        self.schema_sql = [
+            statement
+            for table in self.creation_order
+            for statement in [table.create_sql] + [index.sql for index in table.indexes]
+        ]
+        digest = hashlib.sha256('\n'.join(self.schema_sql).encode()).hexdigest()
+        self.schema_version = int(digest[:8], 16) & 0x7fffffff or 1
 
-        self.validate()
 
+    @classmethod
+    def from_config(cls, db_name, config):
+        if isinstance(config, list):
+            return cls(db_name, config)
 
-    def validate(self):
-        table_names = [table.name for table in self.tables]
+        return cls(
+            db_name,
+            config['tables'],
+            generate_async=config.get('async', False),
+            joins=config.get('joins', ()),
+            profile=config.get('profile', 'default'),
+            pragmas=config.get('pragmas')
+        )
 
-        if not self.name:
-            msg = 'TRIED TO GENERATE UNNAMED DATABASE'
+
+    @staticmethod
+    def resolve_pragmas(profile, overrides):
+        if profile not in PRAGMA_PROFILES:
+            msg = f'UNKNOWN PRAGMA PROFILE {profile}, EXPECTED ONE OF {", ".join(PRAGMA_PROFILES)}'
             raise ValueError(msg)
 
+        pragmas = {**PRAGMA_PROFILES[profile], **overrides}
+        for key, value in pragmas.items():
+            if not key.isidentifier():
+                msg = f'INVALID PRAGMA NAME {key}'
+                raise ValueError(msg)
+            if not isinstance(value, int) and not str(value).isidentifier():
+                msg = f'INVALID VALUE FOR PRAGMA {key}: {value}'
+                raise ValueError(msg)
+        return pragmas
+
+
+    def link_references(self):
+        dataclasses = {table.name: table.dataclass for table in self.tables}
         for table in self.tables:
-            column_names = [column.name for column in table.columns]
-            group_names = [group.name for group in table.groups]
-            filter_names = [filter.name for filter in table.filters]
+            for column in table.reference_columns:
+                column.classes.reference_dataclass = \
+                    dataclasses[column.classes.reference_table]
+            table.reference_dataclasses = sorted({
+                column.classes.reference_dataclass
+                for column in table.reference_columns
+                if column.classes.reference_dataclass != table.dataclass
+            })
+
+
+    def compile(self):
+        errors = []
+        self.table_index = {}
+        self.dependencies = {}
+        self.creation_order = []
+        self.warnings = []
 
-            if (not table.name or len(table.name) < 1):
-                msg = f'INVALID TABLE NAME: {table.name if table.name else "NONE"}'
-                raise ValueError(msg)
+        if not self.name:
+            errors.append('TRIED TO GENERATE UNNAMED DATABASE')
 
-            if table_names.count(table.name) > 1:
-                msg = f'DATABASE CONTAINS DUPLICATE TABLES {table.name}'
-                raise ValueError(msg)
+        for table in self.tables:
+            if not table.name:
+                errors.append('INVALID TABLE NAME: NONE')
+            elif table.name in self.table_index:
+                errors.append(f'DATABASE CONTAINS DUPLICATE TABLES {table.name}')
+            else:
+                self.table_index[table.name] = table
+
+        for table in self.tables:
+            errors.extend(self._compile_table(table))
+
+        self.warnings.extend(self._order_tables())
+        return errors
+
+
+    def _compile_table(self, table):
+        errors = []
+        columns = {}
+        groups = {}
+        filters = set()
+        dependencies = set()
+
+        for column in table.columns:
+            if not column.name:
+                errors.append(f'TABLE {table.name} CONTAINS AN UNNAMED COLUMN')
+                continue
+            if column.name == 'rowid':
+                errors.append(f'TABLE {table.name} INCLUDES A ROWID COLUMN\n\tThis column is automatically generated')
+                continue
+            if column.name in columns:
+                errors.append(f'TABLE {table.name} CONTAINS DUPLICATE COLUMNS {column.name}')
+                continue
+            columns[column.name] = column
+
+            if column.py_data_type is None:
+                errors.append(f'INVALID DATA TYPE FOR COLUMN: {table.name}.{column.name}, {column.data_type}')
 
-            for column in table.columns:
-                if not column.name:
-                    msg = f'TABLE {table.name} CONTAINS AN UNNAMED COLUMN'
-                    raise ValueError(msg)
-                if column.name == 'rowid':
-                    msg = f'TABLE {table.name} INCLUDES A ROWID COLUMN\n\tThis column is automatically generated'
-                    raise ValueError(msg) 
-
-                if column_names.count(column.name) > 1:
-                    msg = f'TABLE {table.name} CONTAINS DUPLICATE COLUMNS {column.name}'
-                    raise ValueError(msg)
-                
-                if 'references' in column.classes.check:
-                    target_table, target_column = column.classes.references.split('(')
-                    target_column = target_column[:-1]
-                    target_table_check = [
-                        t for t in self.tables
-                        if t.name == target_table
-                    ]
-                    if not target_table_check:
-                        msg = f'REFERENCE COLUMN {column.name} ON TABLE {table.name} REFERENCES NONEXISTENT TABLE {column.classes.references}'
-                        raise ValueError(msg)
-                    target_column_check = [
-                        t for t in target_table_check[0].columns
-                        if t.name == target_column
-                    ]
-                    if (not target_column_check and target_column != 'rowid'):
-                        msg = f'REFERENCE COLUMN {column.name} ON TABLE {table.name} REFERENCES NONEXISTENT COLUMN {column.classes.references}'
-                        raise ValueError(msg)
-
-                if 'returns' in column.classes.check:
-                    if (
-                        not column.classes.returns
-                        or column.classes.returns not in ['group', 'single']
-                    ):
-                        msg = f'RETURN COLUMN {column.name} ON TABLE {table.name} HAS AN INVALID RETURN TYPE'
-                        raise ValueError(msg)
-
-            for group in table.groups:
-                if not group.name:
-                    msg = f'TABLE {table.name} CONTAINS AN UNNAMED GROUP'
-                    raise ValueError(msg) 
-
-                if group_names.count(group.name) > 1:
-                    msg = f'TABLE {table.name} CONTAINS DUPLICATE GROUPS {group.name}'
-                    raise ValueError(msg)
-
-                for target_column in group.columns:
-                    target_column_check = [
-                        t for t in table.columns
-                        if t == target_column
-                    ]
-                    if not target_column_check:
-                        msg = f'COLUMN GROUP {group.name} ON TABLE {table.name} CONTAINS A NONEXISTENT COLUMN {target_column.name}'
-                        raise ValueError(msg)
-
-            for filter in table.filters:
-                if not filter.name:
-                    msg = f'TABLE {table.name} CONTAINS AN UNNAMED FILTER'
-                    raise ValueError(msg) 
-
-                if filter_names.count(filter.name) > 1:
-                    msg = f'TABLE {table.name} CONTAINS DUPLICATE FILTERS {filter.name}'
-                    raise ValueError(msg)
-
-                for target_column in filter.columns:
-                    target_column_check = [
-                        t for t in table.columns
-                        if t == target_column
-                    ]
-                    if not target_column_check:
-                        msg = f'FILTER {filter.name} ON TABLE {table.name} CONTAINS A NONEXISTENT COLUMN {target_column.name}'
-                        raise ValueError(msg)
-
-                for target_group in filter.groups:
-                    target_group_check = [
-                        t for t in table.groups
-                        if t == target_group
-                    ]
-                    if not target_group_check:
-                        msg = f'FILTER {filter.name} ON TABLE {table.name} CONTAINS A NONEXISTENT GROUP {target_group.name}'
-                        raise ValueError(msg)
+            if 'references' in column.classes.check:
+                target_table = self.table_index.get(column.classes.reference_table)
+                target_column = column.classes.reference_column
+                if target_table is None:
+                    errors.append(f'REFERENCE COLUMN {column.name} ON TABLE {table.name} REFERENCES NONEXISTENT TABLE {column.classes.references}')
+                elif (
+                    target_column != 'rowid'
+                    and target_column not in target_table.column_names
+                ):
+                    errors.append(f'REFERENCE COLUMN {column.name} ON TABLE {table.name} REFERENCES NONEXISTENT COLUMN {column.classes.references}')
+                elif target_table is not table:
+                    dependencies.add(target_table.name)
+
+            if (
+                'returns' in column.classes.check
+                and column.classes.returns not in ['group', 'single']
+            ):
+                errors.append(f'RETURN COLUMN {column.name} ON TABLE {table.name} HAS AN INVALID RETURN TYPE')
+
+            index = column.classes.index
+            if index is not None and index not in [True, False, 'unique']:
+                errors.append(f'COLUMN {column.name} ON TABLE {table.name} HAS AN INVALID INDEX {index!r}, EXPECTED true, false OR "unique"')
+            elif index == 'unique' and column.classes.returns != 'single':
+                errors.append(f'UNIQUE COLUMN {column.name} ON TABLE {table.name} IS NOT A single RETURN COLUMN')
+
+        for group in table.groups:
+            if not group.name:
+                errors.append(f'TABLE {table.name} CONTAINS AN UNNAMED GROUP')
+                continue
+            if group.name in groups:
+                errors.append(f'TABLE {table.name} CONTAINS DUPLICATE GROUPS {group.name}')
+                continue
+            groups[group.name] = group
+
+            if not group.keys:
+                errors.append(f'COLUMN GROUP {group.name} ON TABLE {table.name} HAS NO COLUMNS')
+            for key in group.keys:
+                if key not in columns:
+                    errors.append(f'COLUMN GROUP {group.name} ON TABLE {table.name} CONTAINS A NONEXISTENT COLUMN {key}')
+
+        for filter in table.filters:
+            if not filter.name:
+                errors.append(f'TABLE {table.name} CONTAINS AN UNNAMED FILTER')
+                continue
+            if filter.name in filters:
+                errors.append(f'TABLE {table.name} CONTAINS DUPLICATE FILTERS {filter.name}')
+                continue
+            filters.add(filter.name)
+
+            if not filter.keys:
+                errors.append(f'FILTER {filter.name} ON TABLE {table.name} HAS NO QUERIES')
+            for key in filter.keys:
+                if key not in columns and key not in groups:
+                    errors.append(f'FILTER {filter.name} ON TABLE {table.name} CONTAINS A NONEXISTENT COLUMN OR GROUP {key}')
+
+        self.dependencies[table.name] = dependencies
+        return errors
+
+
+    def _order_tables(self):
+        positions = {table.name: i for i, table in enumerate(self.tables)}
+        dependents = {name: [] for name in positions}
+        remaining = {}
+        for name, dependencies in self.dependencies.items():
+            remaining[name] = len(dependencies)
+            for dependency in dependencies:
+                dependents[dependency].append(name)
+
+        ready = [positions[name] for name, count in remaining.items() if not count]
+        heapq.heapify(ready)
+        while ready:
+            table = self.tables[heapq.heappop(ready)]
+            self.creation_order.append(table)
+            for name in dependents[table.name]:
+                remaining[name] -= 1
+                if not remaining[name]:
+                    heapq.heappush(ready, positions[name])
+
+        placed = {table.name for table in self.creation_order}
+        pending = [name for name in positions if name not in placed]
+        if not pending:
+            return []
+
+        warnings = []
+        pending = set(pending)
+        while pending:
+            cycle = self._find_cycle(pending, positions)
+            warnings.append(
+                f'REFERENCE CYCLE BETWEEN TABLES {" -> ".join(cycle)}, '
+                'CREATING THEM IN CONFIG ORDER'
+            )
+            pending -= set(cycle)
+            while free := {
+                name for name in pending
+                if not self.dependencies[name] & pending
+            }:
+                pending -= free
+        self.creation_order.extend(
+            table for table in self.tables
+            if table.name not in placed
+        )
+        return warnings
+
+
+    def _find_cycle(self, pending, positions):
+        path = []
+        seen = {}
+        name = min(pending, key=positions.get)
+        while name not in seen:
+            seen[name] = len(path)
+            path.append(name)
+            name = min(self.dependencies[name] & pending, key=positions.get)
+        return path[seen[name]:] + [name]
 
 
 class Table:
@@ -122,15 +284,23 @@ class Table:
         columns,
         groups,
         filters,
-        join=False
+        join=False,
+        cache_size=0,
+        query_cache=None
     ):
         self.references = False
         self.join = join
+        self.cache_size = cache_size
+        self.query_cache = query_cache
         self.name = table_name
         self.dataclass = dataclass_name
 
         self.columns = [Column(**column) for column in columns]
+        self.column_names = {column.name for column in self.columns}
         self.length = len(self.columns) - 1
+        self.select = ', '.join(
+            [column.name for column in self.columns] + ['rowid']
+        )
         self.list_columns = [
             column for column in self.columns
             if 'returns' in column.classes.check
@@ -145,6 +315,10 @@ class Table:
             column for column in self.columns
             if not 'returns' in column.classes.check
         ]
+        self.unique_columns = [
+            column for column in self.columns
+            if column.classes.index == 'unique'
+        ]
 
         self.groups = [
             Group(self.columns, **group)
@@ -155,10 +329,208 @@ class Table:
             for filter in filters
         ]
 
+        self.reference_columns = [
+            column for column in self.columns
+            if 'references' in column.classes.check
+        ]
+        self.references = bool(self.reference_columns)
+
+        self.wheres = (
+            [('all', '1', ()), ('rowid', 'rowid=?', (0,))]
+            + [(column.name, f'{column.name}=?', (0,)) for column in self.columns]
+            + [(group.name, group.where, (0,) * len(group.columns)) for group in self.groups]
+            + [(filter.name, filter.where, filter.positions) for filter in self.filters]
+        )
+
+        self.definition = ', '.join(
+            [f'{column.name} {column.data_type}{column.params}' for column in self.columns]
+            + ['rowid INTEGER PRIMARY KEY AUTOINCREMENT']
+            + [
+                f'FOREIGN KEY({column.name}) REFERENCES {column.classes.references}'
+                for column in self.reference_columns
+            ]
+        )
+        self.create_sql = f'CREATE TABLE IF NOT EXISTS {self.name}({self.definition})'
+        self.indexes = self._build_indexes()
+
+
+    def _build_indexes(self):
+        indexes = {}
+
+        def add(columns, unique=False):
+            key = tuple(column.name for column in columns)
+            if not key or (key in indexes and not unique):
+                return
+            indexes[key] = Index(self.name, columns, unique)
+
         for column in self.columns:
-            if 'references' in column.classes.check:
-                self.references = True
-                break
+            index = column.classes.index
+            if index is False:
+                continue
+            if index == 'unique':
+                add([column], unique=True)
+            elif index or 'returns' in column.classes.check:
+                add([column])
+
+        for group in self.groups:
+            if group.index:
+                for column in group.columns:
+                    add([column])
+
+        for filter in self.filters:
+            if filter.index:
+                columns = [
+                    column
+                    for name in filter.keys
+                    for column in filter.columns
+                    if column.name == name
+                ]
+                add(columns)
+
+        return list(indexes.values())
+
+
+class JoinTable:
+    def __init__(
+        self,
+        table_list,
+        table_name,
+        dataclass_name,
+        left,
+        right,
+        on=None,
+        type='INNER',
+        filters=()
+    ):
+        self.join = True
+        self.name = table_name
+        self.dataclass = dataclass_name
+        self.type = type.upper()
+
+        if self.type not in ['INNER', 'LEFT']:
+            msg = f'JOIN TABLE {self.name} HAS AN INVALID JOIN TYPE {type}'
+            raise ValueError(msg)
+
+        tables = {table.name: table for table in table_list}
+        for side in [left, right]:
+            if side not in tables:
+                msg = f'JOIN TABLE {self.name} REFERENCES NONEXISTENT TABLE {side}'
+                raise ValueError(msg)
+        if left == right:
+            msg = f'JOIN TABLE {self.name} JOINS {left} TO ITSELF'
+            raise ValueError(msg)
+
+        self.left = tables[left]
+        self.right = tables[right]
+        self.left_field = self.left.name[:-1]
+        self.right_field = self.right.name[:-1]
+
+        if on is None:
+            on = self._infer_on()
+        self.left_on, self.right_on = on
+
+        for table, column_name in [
+            (self.left, self.left_on),
+            (self.right, self.right_on)
+        ]:
+            if (
+                column_name != 'rowid'
+                and column_name not in [column.name for column in table.columns]
+            ):
+                msg = f'JOIN TABLE {self.name} JOINS ON NONEXISTENT COLUMN {table.name}.{column_name}'
+                raise ValueError(msg)
+
+        self.select = ', '.join(
+            f'{table.name}.{column}'
+            for table in [self.left, self.right]
+            for column in table.select.split(', ')
+        )
+        self.split = len(self.left.columns) + 1
+        self.source = (
+            f'{self.left.name} {self.type} JOIN {self.right.name} '
+            f'ON {self.left.name}.{self.left_on}={self.right.name}.{self.right_on}'
+        )
+        self.filters = [JoinFilter(self, **filter) for filter in filters]
+
+        self._index_join_columns()
+
+
+    def _infer_on(self):
+        candidates = [
+            (column.name, column.classes.reference_column)
+            for column in self.left.reference_columns
+            if column.classes.reference_table == self.right.name
+        ]
+        if len(candidates) != 1:
+            msg = f'JOIN TABLE {self.name} NEEDS AN EXPLICIT "on", {self.left.name} HAS {len(candidates)} REFERENCES TO {self.right.name}'
+            raise ValueError(msg)
+        return candidates[0]
+
+
+    def _index_join_columns(self):
+        for table, column_name in [
+            (self.left, self.left_on),
+            (self.right, self.right_on)
+        ]:
+            if column_name == 'rowid':
+                continue
+            if any(index.columns[0] == column_name for index in table.indexes):
+                continue
+            column = [c for c in table.columns if c.name == column_name][0]
+            table.indexes.append(Index(table.name, [column]))
+
+
+class JoinFilter:
+    def __init__(
+        self,
+        join,
+        name,
+        queries
+    ):
+        self.name = name
+        self.queries = []
+        where = []
+
+        for query in queries:
+            table_name, _, query_name = query.partition('.')
+            if table_name == join.left.name:
+                table = join.left
+            elif table_name == join.right.name:
+                table = join.right
+            else:
+                msg = f'FILTER {name} ON JOIN TABLE {join.name} QUERIES {query}, WHICH IS NOT ON EITHER SIDE OF THE JOIN'
+                raise ValueError(msg)
+
+            columns = [c for c in table.columns if c.name == query_name]
+            groups = [g for g in table.groups if g.name == query_name]
+            if columns:
+                target = columns[0]
+                where.append(f'{table.name}.{target.name}=?')
+                self.queries.append((target, [target.name]))
+            elif groups:
+                target = groups[0]
+                where.append('({})'.format(' OR '.join(
+                    f'{table.name}.{column.name}=?'
+                    for column in target.columns
+                )))
+                self.queries.append(
+                    (target, [target.name for column in target.columns])
+                )
+            else:
+                msg = f'FILTER {name} ON JOIN TABLE {join.name} CONTAINS A NONEXISTENT COLUMN OR GROUP {query}'
+                raise ValueError(msg)
+
+        names = [target.name for target, _ in self.queries]
+        if len(set(names)) != len(names):
+            msg = f'FILTER {name} ON JOIN TABLE {join.name} QUERIES TWO COLUMNS NAMED THE SAME'
+            raise ValueError(msg)
+
+        self.where = ' AND '.join(where)
+        self.args = ', '.join(arg for _, args in self.queries for arg in args)
+        self.signature = ', '.join(
+            f'{target.name}: {target.py_data_type}'
+            for target, _ in self.queries
+        )
 
 
 class Column:
@@ -175,8 +547,7 @@ class Column:
             case 'INTEGER':
                 self.py_data_type = 'int'
             case _:
-                msg = f'INVALID DATA TYPE FOR COLUMN: {self.name}, {self.data_type}'
-                raise ValueError(msg)
+                self.py_data_type = None
 
         self.data_type = data_type
         self.name = name
@@ -189,15 +560,22 @@ class Group:
         self,
         column_list,
         name,
-        columns
+        columns,
+        index=True
     ):
         self.name = name
+        self.index = index
+        self.keys = columns
         self.columns = [
             column for column in column_list
             if column.name in columns
         ]
         self.length = len(self.columns) - 1
-        self.py_data_type = self.columns[0].py_data_type
+        self.py_data_type = self.columns[0].py_data_type if self.columns else None
+        self.where = '({})'.format(
+            ' OR '.join(f'{column.name}=?' for column in self.columns)
+        )
+        self.args = ', '.join(self.name for column in self.columns)
 
 
 class Filter:
@@ -206,9 +584,12 @@ class Filter:
         column_list,
         group_list,
         name,
-        queries
+        queries,
+        index=True
     ):
         self.name = name
+        self.index = index
+        self.keys = queries
         self.columns = [
             column for column in column_list
             if column.name in queries 
@@ -219,13 +600,49 @@ class Filter:
         ]
         self.queries = self.columns + self.groups
         self.length = len(self.queries) - 1
+        self.where = ' AND '.join(
+            [f'{column.name}=?' for column in self.columns]
+            + [group.where for group in self.groups]
+        )
+        self.args = ', '.join(
+            [column.name for column in self.columns]
+            + [group.args for group in self.groups]
+        )
+        self.positions = tuple(range(len(self.columns))) + tuple(
+            len(self.columns) + i
+            for i, group in enumerate(self.groups)
+            for column in group.columns
+        )
+        self.signature = ', '.join(
+            f'{query.name}: {query.py_data_type}'
+            for query in self.queries
+        )
+
+
+class Index:
+    def __init__(
+        self,
+        table_name,
+        columns,
+        unique=False
+    ):
+        self.columns = [column.name for column in columns]
+        self.name = f'{table_name}_{"_".join(self.columns)}_idx'
+        self.unique = unique
+        self.sql = 'CREATE {}INDEX IF NOT EXISTS {} ON {}({})'.format(
+            'UNIQUE ' if unique else '',
+            self.name,
+            table_name,
+            ', '.join(self.columns)
+        )
 
 
 class ColumnClass:
     def __init__(
         self,
         returns=None,
-        references=None
+        references=None,
+        index=None
     ):
         self.check = []
         if returns:
@@ -235,3 +652,10 @@ class ColumnClass:
 
         self.returns = returns
         self.references = references
+        self.reference_table = None
+        self.reference_column = None
+        self.reference_dataclass = None
+        if references and '(' in references:
+            self.reference_table, self.reference_column = references.split('(')
+            self.reference_column = self.reference_column[:-1]
+        self.index = index
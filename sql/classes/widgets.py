@@ -2,9 +2,9 @@ from tkinter import filedialog
 
 import teedoh_kinter as tk
 
-from utils import snake_case, pascal_case
-from templating import generate_filesystem, generate_module
-from file_config import save_config, load_config
+from ..utils import snake_case, pascal_case
+from ..templating import generate_filesystem, generate_module
+from ..file_config import save_config, load_config
 from .classes import Database
 
 
@@ -463,6 +463,8 @@ class DbFrame(tk.Frame):
 
         for db_name, tables in config.items():
             self.name = db_name
+            if isinstance(tables, dict):
+                tables = tables['tables']
 
             for table in tables:
                 table_frame = self.tables.add()
@@ -521,7 +523,7 @@ class DbFrame(tk.Frame):
         config = self.config
         for db_name, tables_list in config.items():
             path = filedialog.askdirectory(title='Where to Save DB Module?')
-            db = Database(db_name, tables_list)
+            db = Database.from_config(db_name, tables_list)
             fs = generate_filesystem(path, db)
             generate_module(db, fs)
             save_config(config, fs)
@@ -0,0 +1,117 @@
+import argparse
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import nullcontext
+
+from .classes.classes import Database
+from .templating import generate_filesystem, generate_module
+
+
+PARALLEL_TABLES = 32
+
+
+def load_databases(config_paths):
+    databases = []
+    for config_path in config_paths:
+        with open(config_path, 'r') as f:
+            config = json.load(f)
+        for db_name, db_config in config.items():
+            databases.append(Database.from_config(db_name, db_config))
+    return databases
+
+
+def generate(args):
+    databases = load_databases(args.configs)
+
+    jobs = args.jobs
+    if jobs is None:
+        tables = sum(len(db.tables) + len(db.joins) for db in databases)
+        jobs = os.cpu_count() if tables >= PARALLEL_TABLES else 1
+
+    drift = False
+    with (
+        ProcessPoolExecutor(jobs) if jobs > 1 else nullcontext()
+    ) as executor:
+        for db in databases:
+            for warning in db.warnings:
+                print(f'{db.name}: warning: {warning}')
+            fs = generate_filesystem(args.output, db)
+            report = generate_module(db, fs, args.check, executor, args.force)
+            drift = drift or report['drift']
+
+            verb = 'would write' if args.check else 'wrote'
+            for name in report['written']:
+                print(f'{db.name}: {verb} {name}')
+            verb = 'would remove' if args.check else 'removed'
+            for name in report['removed']:
+                print(f'{db.name}: {verb} {name}')
+            verb = 'overwrote' if args.force and not args.check else 'kept'
+            for name in report['modified']:
+                print(f'{db.name}: {verb} locally modified {name}')
+            print(
+                f'{db.name}: {len(report["written"])} changed, '
+                f'{len(report["removed"])} removed, '
+                f'{len(report["modified"])} locally modified, '
+                f'{len(report["unchanged"])} unchanged'
+            )
+
+    return 1 if args.check and drift else 0
+
+
+def gui(args):
+    from .classes.widgets import DbFrame
+    from teedoh_kinter import Tk
+
+    app = Tk(
+        title='TEEDOH\'S SQL ORM GENERATOR',
+        geometry='590x800'
+    )
+    app.add_component(
+        DbFrame
+    )
+    app.pack()
+    app.mainloop()
+    return 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog='python -m sql',
+        description='generate sqlite orm modules from json configs'
+    )
+    commands = parser.add_subparsers(dest='command')
+
+    generate_parser = commands.add_parser(
+        'generate',
+        help='render the modules for one or more configs'
+    )
+    generate_parser.add_argument('configs', nargs='+')
+    generate_parser.add_argument('-o', '--output', default='.')
+    generate_parser.add_argument(
+        '--check',
+        action='store_true',
+        help='report drift without writing, exit 1 if there is any'
+    )
+    generate_parser.add_argument(
+        '--force',
+        action='store_true',
+        help='overwrite or remove generated files that were edited by hand'
+    )
+    generate_parser.add_argument(
+        '-j',
+        '--jobs',
+        type=int,
+        default=None,
+        help=f'render processes, parallel by default from {PARALLEL_TABLES} tables'
+    )
+    generate_parser.set_defaults(run=generate)
+
+    gui_parser = commands.add_parser('gui', help='open the tk editor')
+    gui_parser.set_defaults(run=gui)
+
+    args = parser.parse_args(argv)
+    if args.command is None:
+        return gui(args)
+    return args.run(args)
+
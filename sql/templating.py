@@ -1,3 +1,4 @@
+import hashlib
 import json
 import os
 from pathlib import Path
@@ -5,14 +6,21 @@ from pathlib import Path
 import jinja2
 
 
-templates = os.path.expanduser('~/dev/sql_orm_generator/sql/templates/')
-env = jinja2.Environment(loader=jinja2.FileSystemLoader(templates))
+templates = Path(__file__).resolve().parent / 'templates'
+env = jinja2.Environment(
+    loader=jinja2.FileSystemLoader(templates),
+    bytecode_cache=jinja2.FileSystemBytecodeCache(),
+    auto_reload=False
+)
+env.globals['enumerate'] = enumerate
 
-TABLE = env.get_template('table.txt')
-CLASSES = env.get_template('classes.txt')
-DATACLASSES = env.get_template('dataclasses.txt')
-DATABASE = env.get_template('database.txt')
-TABLE_INIT = env.get_template('table_init.txt')
+TABLE = 'table.txt'
+CLASSES = 'classes.txt'
+DATACLASSES = 'dataclasses.txt'
+DATABASE = 'database.txt'
+TABLE_INIT = 'table_init.txt'
+ASYNC_DATABASE = 'async_database.txt'
+JOIN_TABLE = 'join_table.txt'
 
 
 def generate_filesystem(path, db):
@@ -20,7 +28,9 @@ def generate_filesystem(path, db):
         'path': Path(path, db.name).resolve(),
         'init': Path(path, db.name, '__init__.py').resolve(),
         'database': Path(path, db.name, 'database.py').resolve(),
+        'async_database': Path(path, db.name, 'async_database.py').resolve(),
         'config': Path(path, db.name, f'{db.name}_config.json').resolve(),
+        'manifest': Path(path, db.name, 'manifest.json').resolve(),
         'tables': {
             'path': Path(path, db.name, 'tables').resolve(),
             'init': Path(path, db.name, 'tables', '__init__.py').resolve()
@@ -38,46 +48,181 @@ def generate_filesystem(path, db):
     }
 
     for table in db.tables:
-        fs['tables'][table.name] = Path(db.name, 'tables', f'{table.name}.py')
+        fs['tables'][table.name] = Path(path, db.name, 'tables', f'{table.name}.py').resolve()
 
-    return fs
+    for join in db.joins:
+        fs['tables'][join.name] = Path(path, db.name, 'tables', f'{join.name}.py').resolve()
 
+    return fs
 
-def generate_module(db, fs):
-    for dir in [
-        fs['path'],
-        fs['tables']['path'],
-        fs['classes']['path'],
-        fs['data']['path']
-    ]:
-        dir.mkdir()
 
-    open(fs['data']['db'], 'w').close()
-    open(fs['classes']['init'], 'w').close()
+def render(job):
+    template, context = job
+    if template is None:
+        return context
+    return env.get_template(template).render(**context)
 
-    with open(fs['classes']['classes'], 'w') as f:
-        f.write(CLASSES.render())
 
-    with open(fs['init'], 'w') as f:
-        f.write('from .database import Database')
+def render_jobs(db, fs):
+    jobs = {
+        fs['classes']['init']: (None, ''),
+        fs['classes']['classes']: (CLASSES, {}),
+        fs['init']: (None, 'from .database import Database' + (
+            '\nfrom .async_database import AsyncDatabase'
+            if db.generate_async else ''
+        ))
+    }
 
     for table in db.tables:
-        table_class = TABLE.render(
-            table=table,
-            enumerate=enumerate,
-            db_name=db.name
+        jobs[fs['tables'][table.name]] = (
+            TABLE,
+            {'table': table, 'db_name': db.name}
         )
-        with open(fs['tables'][table.name], 'w') as f:
-            f.write(table_class)
 
-    for template, location in {
+    for join in db.joins:
+        jobs[fs['tables'][join.name]] = (JOIN_TABLE, {'join': join})
+
+    locations = {
         DATABASE: fs['database'],
         DATACLASSES: fs['classes']['dataclasses'],
         TABLE_INIT: fs['tables']['init']
-    }.items():
-        rendered_template = template.render(
-            tables=db.tables
-        )
-        with open(location, 'w') as f:
-            f.write(rendered_template)
+    }
+    if db.generate_async:
+        locations[ASYNC_DATABASE] = fs['async_database']
+
+    for template, location in locations.items():
+        jobs[location] = (template, {
+            'tables': db.tables,
+            'creation_order': db.creation_order,
+            'joins': db.joins,
+            'pragmas': db.pragmas,
+            'schema_version': db.schema_version,
+            'db_name': db.name
+        })
+
+    return jobs
+
+
+def render_module(db, fs, executor=None, chunksize=8):
+    jobs = render_jobs(db, fs)
+    if executor is None:
+        contents = map(render, jobs.values())
+    else:
+        contents = executor.map(render, jobs.values(), chunksize=chunksize)
+    return dict(zip(jobs, contents))
+
+
+def load_manifest(fs):
+    try:
+        with open(fs['manifest'], 'r') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+
+def file_digest(path):
+    with open(path, 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def is_current(path, digest, entry):
+    try:
+        stat = path.stat()
+    except FileNotFoundError:
+        return False
+    if (
+        entry
+        and entry['sha256'] == digest
+        and stat.st_size == entry['size']
+        and stat.st_mtime_ns == entry['mtime_ns']
+    ):
+        return True
+    return file_digest(path) == digest
+
+
+def is_modified(path, entry):
+    try:
+        stat = path.stat()
+    except FileNotFoundError:
+        return False
+    if not entry:
+        return True
+    if stat.st_size == entry['size'] and stat.st_mtime_ns == entry['mtime_ns']:
+        return False
+    return file_digest(path) != entry['sha256']
+
+
+def file_entry(path, digest):
+    stat = path.stat()
+    return {
+        'sha256': digest,
+        'size': stat.st_size,
+        'mtime_ns': stat.st_mtime_ns
+    }
+
 
+def write_file(path, content):
+    tmp = path.with_name(f'.{path.name}.tmp')
+    with open(tmp, 'w') as f:
+        f.write(content)
+    os.replace(tmp, path)
+
+
+def generate_module(db, fs, check=False, executor=None, force=False):
+    root = fs['path']
+    files = render_module(db, fs, executor)
+    manifest = load_manifest(fs)
+    report = {'written': [], 'unchanged': [], 'removed': [], 'modified': []}
+    entries = {}
+
+    for path, content in files.items():
+        name = path.relative_to(root).as_posix()
+        digest = hashlib.sha256(content.encode()).hexdigest()
+        entry = manifest.get(name)
+        if is_current(path, digest, entry):
+            report['unchanged'].append(name)
+            entries[name] = entry if check else file_entry(path, digest)
+            continue
+
+        if is_modified(path, entry):
+            report['modified'].append(name)
+            if not force:
+                if entry:
+                    entries[name] = entry
+                continue
+
+        report['written'].append(name)
+        entries[name] = entry
+        if not check:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            write_file(path, content)
+            entries[name] = file_entry(path, digest)
+
+    for name, entry in manifest.items():
+        if name in entries:
+            continue
+        path = Path(root, name)
+        if is_modified(path, entry):
+            report['modified'].append(name)
+            if not force:
+                entries[name] = entry
+                continue
+
+        report['removed'].append(name)
+        if not check:
+            path.unlink(missing_ok=True)
+
+    report['drift'] = bool(
+        report['written'] or report['removed'] or report['modified']
+    )
+    if check:
+        return report
+
+    fs['data']['path'].mkdir(parents=True, exist_ok=True)
+    if not fs['data']['db'].exists():
+        fs['data']['db'].touch()
+
+    if report['drift'] or entries != manifest:
+        write_file(fs['manifest'], json.dumps(entries, indent=4, sort_keys=True))
+
+    return report